@@ -10,7 +10,8 @@ como um substituto rápido de planners PDDL completos durante desenvolvimento
 e testes iniciais.
 
 FUNCIONAMENTO:
-  O script realiza parsing de um subconjunto mínimo de PDDL em português para:
+  O script realiza parsing de um subconjunto mínimo de PDDL em português,
+  tokenizando o arquivo em S-expressions em uma única passada, para:
   1. Extrair todos os locais declarados no problema
   2. Identificar o nome do robô definido
   3. Extrair a posição inicial do robô: (em robo <local>)
@@ -20,7 +21,7 @@ FUNCIONAMENTO:
   Com essas informações, o planejador:
   - Constrói um grafo de conectividade do hospital
   - Calcula o caminho mais curto entre a posição inicial e o objetivo
-    usando o algoritmo BFS (Busca em Largura)
+    usando o algoritmo BFS (Busca em Largura) bidirecional
   - Gera um plano de ações de navegação OU um objeto JSON estilo API
 
 MODOS DE SAÍDA:
@@ -45,7 +46,7 @@ FORMATO DE SAÍDA (Plano PDDL):
   ...
 
 FORMATO DE SAÍDA (API JSON):
-  {"task": "navigate", "destination": "farmacia", "destination_label": "farmácia"}
+  {"task":"navigate","destination":"farmacia","destination_label":"farmácia"}
 
 LIMITAÇÕES:
   - Este é um planejador SIMPLIFICADO para demonstração
@@ -56,13 +57,63 @@ LIMITAÇÕES:
 ==============================================================================
 """
 
+import os
 import re
 import sys
-from collections import deque, defaultdict
-from typing import Dict
+from array import array
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Optional
 import json
 
 
+# ============================================================================
+# EXPRESSÕES REGULARES PRÉ-COMPILADAS
+# ============================================================================
+# Tokens de S-expressions: um token PDDL é um parêntese, um comentário (';' até o fim da linha) ou um
+# átomo (qualquer sequência sem espaços, parênteses ou ';'). O padrão é
+# compilado uma única vez e o texto é percorrido em uma só passada.
+_TOKEN_RE = re.compile(r"[()]|;[^\n]*|[^\s();]+")
+
+# Comentários para strip_comments(): a primeira alternativa casa linhas em
+# branco ou só de comentário (com a quebra de linha), a segunda casa
+# comentários inline (de ';' até o fim da linha)
+_COMMENT_RE = re.compile(r"^[ \t]*(?:;.*)?(?:\n|\Z)|;.*$", re.MULTILINE)
+
+
+# ============================================================================
+# SERIALIZAÇÃO JSON
+# ============================================================================
+# Usa orjson (extensão em C, bem mais rápida) quando instalado, com fallback
+# para o json da biblioteca padrão. A saída é a mesma nos dois casos (e a
+# mesma do planners/pddl_planner.py): JSON compacto, sem espaços após ':' e
+# ',' (o orjson não tem outro formato), com acentos em UTF-8 (sem \uXXXX).
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# ============================================================================
+# RÓTULOS HUMANIZADOS DE LOCAIS
+# ============================================================================
+# Construído uma única vez no carregamento do módulo (e não a cada execução
+# de main()). Locais fora do mapa têm underscores trocados por espaços.
+_PRETTY_MAP = {
+    "farmacia": "farmácia",
+    "recepcao": "recepção",
+    "corredor_central": "corredor central",
+    "corredor_ala_1": "corredor ala 1",
+    "corredor_ala_2": "corredor ala 2",
+    "corredor_ala_3": "corredor ala 3",
+    "sala_cirurgia": "sala de cirurgia",
+}
+
+
 def strip_comments(text: str) -> str:
     """
     Remove comentários PDDL do texto.
@@ -71,34 +122,112 @@ def strip_comments(text: str) -> str:
     - Linhas que começam com ';' (comentários de linha completa)
     - Comentários inline (tudo após ';' na mesma linha do código)
     
-    Isso facilita o parsing posterior do PDDL.
+    Útil para inspecionar ou pré-processar arquivos PDDL. O parse_problem()
+    não depende desta função: o tokenizador já descarta comentários.
     
     Args:
         text: Conteúdo completo do arquivo PDDL
         
     Returns:
-        Texto sem comentários
+        Texto sem comentários (sem nenhum ';', o próprio texto de entrada)
         
     Nota:
         Em PDDL, comentários começam com ';' (ponto e vírgula)
         Similar ao ';' em Lisp/Scheme
     """
-    lines = []
-    for line in text.splitlines():
-        # Remove comentários inline (tudo após o primeiro ';')
-        if ';' in line:
-            line = line.split(';')[0]
+    # Caminho rápido: sem nenhum ';' (comum em PDDL gerado por máquina)
+    # não há comentários a remover; a busca de um caractere é um memchr
+    if ';' not in text:
+        return text
+    
+    # Uma única substituição em C: remove linhas vazias ou só de comentário
+    # (incluindo a quebra de linha) e comentários inline até o fim da linha
+    return _COMMENT_RE.sub("", text)
+
+
+def _tokenize(text: str):
+    """
+    Extrai os tokens de um texto PDDL, da esquerda para a direita.
+    
+    Comentários (';' até o fim da linha) são descartados durante a própria
+    tokenização, dispensando uma passada prévia de strip_comments().
+    
+    Os tokens são extraídos com um único findall() (em C, sem criar um
+    objeto Match por token) e internados (sys.intern): nomes de locais que
+    se repetem em vários fatos passam a ser o mesmo objeto, e as comparações
+    no conjunto de visitados da BFS se resolvem por identidade.
+    
+    Args:
+        text: Conteúdo do arquivo PDDL
         
-        s = line.strip()
-        # Ignora linhas que ficaram vazias após remover comentários
-        if not s:
-            continue
+    Returns:
+        Iterável de tokens: "(", ")" ou átomos como "conectado", "r1", ":init"
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if ';' not in text:
+        # Sem comentários: dispensa o teste de ';' a cada token
+        return map(sys.intern, tokens)
+    return [sys.intern(token) for token in tokens if token[0] != ';']
+
+
+def _parse_sexpr(tokens) -> list:
+    """
+    Constrói a árvore de S-expressions a partir dos tokens.
+    
+    Usa uma pilha explícita (sem recursão), portanto cada token é
+    visitado exatamente uma vez.
+    
+    Args:
+        tokens: Iterável de tokens produzido por _tokenize()
         
-        lines.append(line)
-    return "\n".join(lines)
+    Returns:
+        Lista com as formas de nível superior; cada forma é uma lista
+        aninhada de átomos (str) e sub-formas (list).
+        Exemplo: [["define", ["problem", "p"], [":init", ["em", "r1", "base"]]]]
+        
+    Raises:
+        ValueError: Se os parênteses estiverem desbalanceados
+    """
+    stack = [[]]
+    for token in tokens:
+        if token == "(":
+            stack.append([])
+        elif token == ")":
+            if len(stack) == 1:
+                raise ValueError("Parêntese ')' sem correspondente no arquivo PDDL")
+            form = stack.pop()
+            stack[-1].append(form)
+        else:
+            stack[-1].append(token)
+    
+    if len(stack) != 1:
+        raise ValueError("Parênteses desbalanceados no arquivo PDDL")
+    return stack[0]
+
+
+def _head(form) -> str:
+    """Retorna o primeiro átomo de uma forma em minúsculas ('' se não houver)."""
+    if isinstance(form, list) and form and isinstance(form[0], str):
+        return form[0].lower()
+    return ""
+
+
+def _collect_em_facts(form, facts: list):
+    """
+    Coleta, em ordem, todos os fatos (em <robo> <local>) de uma forma.
+    
+    Percorre sub-formas como (and ...) para suportar objetivos compostos.
+    """
+    if _head(form) == "em" and len(form) == 3:
+        facts.append((form[1], form[2]))
+        return
+    if isinstance(form, list):
+        for child in form:
+            if isinstance(child, list):
+                _collect_em_facts(child, facts)
 
 
-def parse_problem(file_path: str):
+def parse_problem(file_path: str, with_reverse: bool = False):
     """
     Faz parsing de um arquivo PDDL de problema e extrai as informações essenciais.
     
@@ -110,10 +239,15 @@ def parse_problem(file_path: str):
     
     Args:
         file_path: Caminho para o arquivo .pddl do problema
+        with_reverse: Se True, inclui também o grafo reverso
+                      {local_destino: (origens, ...)}, usado pela BFS
+                      bidirecional
         
     Returns:
         Uma tupla contendo (nome_robo, local_inicial, local_objetivo, grafo_conexoes)
-        onde grafo_conexoes é um dicionário {local_origem: [lista_destinos]}
+        onde grafo_conexoes é um dicionário {local_origem: (destinos, ...)}
+        com tuplas imutáveis como listas de adjacência.
+        Com with_reverse=True, o grafo reverso é acrescentado como quinto item.
         
     Raises:
         ValueError: Se alguma seção obrigatória não for encontrada
@@ -123,90 +257,154 @@ def parse_problem(file_path: str):
         # robot = "r1"
         # start = "base"
         # goal = "farmacia"
-        # edges = {"base": ["farmacia"], "farmacia": ["base"]}
+        # edges = {"base": ("farmacia",), "farmacia": ("base",)}
+    
+    Cache:
+        O resultado é memoizado por (caminho, mtime, tamanho) do arquivo:
+        chamadas repetidas só refazem o parsing se o arquivo mudar.
+        O grafo retornado é compartilhado entre chamadas e não deve ser
+        modificado.
     """
-    # Ler o arquivo PDDL
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Remover comentários para facilitar o parsing
-    content = strip_comments(content)
-
-    # =========================================================================
-    # PASSO 1: Extrair objetos declarados no problema
-    # =========================================================================
-    # Procura o bloco (:objects ...) no PDDL
-    objects_match = re.search(r"\(:objects([\s\S]*?)\)", content, re.IGNORECASE)
-    if not objects_match:
-        raise ValueError("Bloco :objects não encontrado no arquivo PDDL")
-    objects_block = objects_match.group(1)
+    parsed = _load_problem(file_path)
+    return parsed[:5] if with_reverse else parsed[:4]
+
+
+def _load_problem(file_path: str):
+    """
+    Retorna o resultado completo (e memoizado) do parsing de um problema.
+    
+    Além dos itens de parse_problem(), inclui como sexto item o grafo no
+    formato CSR (ver build_csr) quando ele tem pelo menos CSR_MIN_LOCATIONS
+    locais e o numba está disponível, ou None.
+    """
+    st = os.stat(file_path)
+    return _parse_cached(file_path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=32)
+def _parse_cached(file_path: str, mtime_ns: int, size: int):
+    """
+    Núcleo de parse_problem(), memoizado por arquivo e versão.
+    
+    mtime_ns e size não são usados no corpo: servem apenas como parte da
+    chave do cache, invalidando-o quando o arquivo é alterado.
+    """
+    # Ler o arquivo PDDL em bytes e decodificar de uma só vez (sem o
+    # TextIOWrapper); "utf-8-sig" descarta o BOM de editores do Windows
+    with open(file_path, "rb", buffering=1 << 20) as f:
+        content = f.read().decode("utf-8-sig")
+
+    # Tokenizar e montar a árvore em uma única passada
+    # (comentários são descartados pelo próprio tokenizador)
+    forms = _parse_sexpr(_tokenize(content))
+    define = next((f for f in forms if _head(f) == "define"), None)
+    if define is None:
+        raise ValueError("Bloco (define ...) não encontrado no arquivo PDDL")
 
-    # Parsear objetos: procurar padrões como "pudu - robo" ou "base farmacia - local"
     robot_names = []
     locations = []
-    
-    for line in objects_block.splitlines():
-        line = line.strip()
-        if not line or line.startswith(";"):
-            continue
-        
-        # Procurar padrão: nome1 nome2 ... - tipo
-        m = re.search(r"^(.*?)\s-\s(\w+)$", line)
-        if not m:
-            continue
-            
-        names_part, type_name = m.group(1), m.group(2)
-        names = [n for n in names_part.strip().split() if n]
-        
-        # Categorizar por tipo
-        if type_name.lower() == "robo":
-            robot_names.extend(names)
-        elif type_name.lower() == "local":
-            locations.extend(names)
+    init_em = {}          # robo (em minúsculas) -> local inicial
+    goal_em = []          # [(robo, local)] na ordem em que aparecem
+    edges = {}
+    rev_edges = {}
+    pairs = []            # [(origem, destino)] na ordem dos fatos conectado
+    found_objects = found_init = found_goal = False
+
+    # Percorrer cada seção do (define ...) uma única vez, despachando pelo
+    # primeiro átomo (:objects, :init, :goal)
+    for section in define[1:]:
+        head = _head(section)
+
+        # =====================================================================
+        # PASSO 1: Extrair objetos declarados no problema
+        # =====================================================================
+        # Os objetos aparecem como "nome1 nome2 ... - tipo"
+        if head == ":objects":
+            found_objects = True
+            pending = []
+            atoms = iter(section[1:])
+            for atom in atoms:
+                if atom != "-":
+                    pending.append(atom)
+                    continue
+                type_name = next(atoms, "").lower()
+                # Categorizar por tipo
+                if type_name == "robo":
+                    robot_names.extend(pending)
+                elif type_name == "local":
+                    locations.extend(pending)
+                pending = []
+
+        # =====================================================================
+        # PASSO 2: Extrair estado inicial (:init)
+        # =====================================================================
+        # O bloco :init contém a posição inicial de cada robô (em <robo> <local>)
+        # e a topologia do hospital (conectado <origem> <destino>), que forma
+        # um grafo direcionado de navegação
+        elif head == ":init":
+            found_init = True
+            # Pré-alocar as listas de adjacência com os locais declarados
+            # em :objects (que no PDDL vem antes de :init)
+            for loc in locations:
+                edges[loc] = []
+                rev_edges[loc] = []
+            for fact in section[1:]:
+                fact_head = _head(fact)
+                if len(fact) != 3:
+                    continue
+                if fact_head == "conectado":
+                    # setdefault cobre locais usados sem declaração em :objects
+                    edges.setdefault(fact[1], []).append(fact[2])
+                    rev_edges.setdefault(fact[2], []).append(fact[1])
+                    pairs.append((fact[1], fact[2]))
+                elif fact_head == "em":
+                    # PDDL não diferencia maiúsculas: (em R1 base) vale para r1
+                    init_em.setdefault(fact[1].lower(), fact[2])
+
+        # =====================================================================
+        # PASSO 3: Extrair objetivo (:goal)
+        # =====================================================================
+        # Procurar onde o robô deve estar ao final: (em <robo> <local>),
+        # inclusive dentro de objetivos compostos como (and ...)
+        elif head == ":goal":
+            found_goal = True
+            _collect_em_facts(section[1:], goal_em)
+
+    if not found_objects:
+        raise ValueError("Bloco :objects não encontrado no arquivo PDDL")
+    if not found_init:
+        raise ValueError("Bloco :init não encontrado no arquivo PDDL")
 
     # Validar que existe pelo menos um robô
     if not robot_names:
         raise ValueError("Nenhum robô declarado no bloco :objects")
     robot = robot_names[0]  # Usar o primeiro robô encontrado
 
-    # =========================================================================
-    # PASSO 2: Extrair estado inicial (:init)
-    # =========================================================================
-    # O bloco :init contém o estado inicial do mundo
-    init_match = re.search(r"\(:init([\s\S]*?)\)\s*\)\s*\Z|\(:init([\s\S]*?)\)\s*\(:goal", content, re.IGNORECASE)
-    if not init_match:
-        raise ValueError("Bloco :init não encontrado no arquivo PDDL")
-    init_block = next(g for g in init_match.groups() if g)
-
-    # Extrair posição inicial do robô: (em <robo> <local>)
-    init_loc_match = re.search(r"\(em\s+" + re.escape(robot) + r"\s+(\w+)\)", init_block, re.IGNORECASE)
-    if not init_loc_match:
-        # Tentar buscar em todo o conteúdo como fallback
-        init_loc_match = re.search(r"\(em\s+" + re.escape(robot) + r"\s+(\w+)\)", content, re.IGNORECASE)
-        if not init_loc_match:
-            raise ValueError(f"Posição inicial do robô '{robot}' não encontrada em :init")
-    start_loc = init_loc_match.group(1)
-
-    # Extrair todas as conexões: (conectado <origem> <destino>)
-    # Constrói um grafo direcionado de navegação
-    edges = defaultdict(list)
-    for m in re.finditer(r"\(conectado\s+(\w+)\s+(\w+)\)", init_block, re.IGNORECASE):
-        origem, destino = m.group(1), m.group(2)
-        edges[origem].append(destino)
-
-    # =========================================================================
-    # PASSO 3: Extrair objetivo (:goal)
-    # =========================================================================
-    # Procurar onde o robô deve estar ao final: (em <robo> <local>)
-    goal_loc_match = re.search(r":goal[\s\S]*?\(em\s+" + re.escape(robot) + r"\s+(\w+)\)", content, re.IGNORECASE)
-    if not goal_loc_match:
+    robot_key = robot.lower()
+    start_loc = init_em.get(robot_key)
+    if start_loc is None:
+        raise ValueError(f"Posição inicial do robô '{robot}' não encontrada em :init")
+
+    goal_loc = next((loc for r, loc in goal_em if r.lower() == robot_key), None)
+    if not found_goal or goal_loc is None:
         raise ValueError(f"Objetivo para o robô '{robot}' não encontrado em :goal")
-    goal_loc = goal_loc_match.group(1)
 
-    return robot, start_loc, goal_loc, edges
+    # Congelar o grafo: tuplas são mais compactas e rápidas de iterar na BFS.
+    # dict.fromkeys remove conexões duplicadas preservando a ordem, para que
+    # fatos (conectado A B) repetidos não gerem vizinhos repetidos
+    edges = {origem: tuple(dict.fromkeys(destinos)) for origem, destinos in edges.items()}
+    rev_edges = {destino: tuple(dict.fromkeys(origens)) for destino, origens in rev_edges.items()}
 
+    # Em grafos grandes e com numba, montar também o CSR direto dos pares
+    # lidos, sem percorrer de novo o dicionário de adjacência
+    csr = None
+    if len(edges) >= CSR_MIN_LOCATIONS and _jit_bfs_csr() is not None:
+        csr = _csr_from_pairs(locations, pairs)
 
-def bfs_path(edges, start, goal):
+    return robot, start_loc, goal_loc, edges, rev_edges, csr
+
+
+def bfs_path(edges, start, goal, rev_edges=None):
     """
     Calcula o caminho mais curto entre dois locais usando BFS (Busca em Largura).
     
@@ -214,10 +412,16 @@ def bfs_path(edges, start, goal):
     garantindo que o primeiro caminho encontrado até o objetivo seja
     também o caminho com menor número de passos (ótimo).
     
+    Quando o grafo reverso é informado, a busca é bidirecional: parte do
+    início e do objetivo ao mesmo tempo e termina quando as fronteiras se
+    encontram, explorando O(2·b^(d/2)) locais em vez de O(b^d).
+    
     Args:
-        edges: Dicionário representando o grafo {local: [vizinhos]}
+        edges: Dicionário representando o grafo {local: (vizinhos, ...)}
         start: Local de partida (onde o robô está)
         goal: Local de destino (onde o robô quer chegar)
+        rev_edges: Grafo reverso {local: (predecessores, ...)} (opcional);
+                   sem ele, a BFS é feita apenas a partir do início
         
     Returns:
         Lista ordenada de locais formando o caminho, incluindo início e fim.
@@ -235,39 +439,280 @@ def bfs_path(edges, start, goal):
     if start == goal:
         return [start]
     
-    # Conjunto de locais já visitados (para evitar ciclos)
-    visited = set([start])
+    if rev_edges is not None:
+        return _bidirectional_bfs(edges, rev_edges, start, goal)
+    
+    # Mapa de predecessores: local -> local de onde foi alcançado.
+    # Também serve como conjunto de visitados (evita ciclos), sem copiar
+    # o caminho inteiro a cada vizinho enfileirado.
+    parents = {start: None}
     
-    # Fila de exploração: (local_atual, caminho_até_aqui)
-    queue = deque([(start, [start])])
+    # Fila de exploração: apenas o local atual
+    queue = deque([start])
     
     while queue:
         # Pegar próximo local a explorar
-        node, path = queue.popleft()
+        node = queue.popleft()
         
         # Explorar todos os vizinhos deste local
-        for neighbor in edges.get(node, []):
+        # (a tupla vazia padrão é um singleton: nenhuma alocação)
+        for neighbor in edges.get(node, ()):
             # Pular se já visitamos este vizinho
-            if neighbor in visited:
+            if neighbor in parents:
                 continue
             
-            # Construir novo caminho incluindo este vizinho
-            new_path = path + [neighbor]
+            # Registrar de onde chegamos neste vizinho
+            parents[neighbor] = node
             
-            # Verificar se chegamos no objetivo
+            # Verificar se chegamos no objetivo: reconstruir o caminho
+            # uma única vez, seguindo os predecessores de volta ao início
             if neighbor == goal:
-                return new_path
+                path = []
+                current = goal
+                while current is not None:
+                    path.append(current)
+                    current = parents[current]
+                path.reverse()
+                return path
             
-            # Marcar como visitado e adicionar à fila para exploração
-            visited.add(neighbor)
-            queue.append((neighbor, new_path))
+            # Adicionar à fila para exploração
+            queue.append(neighbor)
     
     # Não foi possível encontrar um caminho
     # (grafo desconexo - locais não estão conectados)
     return None
 
 
-def humanize_location(name: str, custom_map: Dict[str, str]) -> str:
+def _bidirectional_bfs(edges, rev_edges, start, goal):
+    """
+    BFS bidirecional: expande, nível a nível, o lado com a menor fronteira.
+    
+    Cada lado guarda {local: (predecessor, profundidade)}. Quando um nível
+    expandido alcança locais já visitados pelo outro lado, o nível é
+    concluído e o encontro com menor distância total é escolhido, o que
+    garante o caminho mais curto.
+    """
+    forward = {start: (None, 0)}
+    backward = {goal: (None, 0)}
+    forward_frontier = [start]
+    backward_frontier = [goal]
+    
+    while forward_frontier and backward_frontier:
+        # Expandir o lado com a menor fronteira
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, graph, seen, other = forward_frontier, edges, forward, backward
+        else:
+            frontier, graph, seen, other = backward_frontier, rev_edges, backward, forward
+        
+        next_frontier = []
+        meeting = None
+        best = None
+        for node in frontier:
+            depth = seen[node][1] + 1
+            for neighbor in graph.get(node, ()):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = (node, depth)
+                next_frontier.append(neighbor)
+                
+                # As buscas se encontraram: guardar o melhor ponto de encontro
+                if neighbor in other:
+                    total = depth + other[neighbor][1]
+                    if best is None or total < best:
+                        best, meeting = total, neighbor
+        
+        if meeting is not None:
+            # Costurar: início -> encontro (invertido) + encontro -> objetivo
+            path = []
+            current = meeting
+            while current is not None:
+                path.append(current)
+                current = forward[current][0]
+            path.reverse()
+            current = backward[meeting][0]
+            while current is not None:
+                path.append(current)
+                current = backward[current][0]
+            return path
+        
+        if seen is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    
+    # Uma das fronteiras se esgotou: não há caminho
+    return None
+
+
+# ============================================================================
+# BFS SOBRE GRAFO CSR (OPCIONALMENTE COMPILADA COM NUMBA)
+# ============================================================================
+# Representação CSR (Compressed Sparse Row): cada local recebe um id inteiro
+# e as adjacências ficam em dois vetores contíguos de inteiros, em vez de um
+# dicionário de tuplas de strings:
+#   - indptr[i] .. indptr[i+1]: faixa de indices com os vizinhos do local i
+#   - indices: ids dos vizinhos, concatenados
+# Sem objetos Python no laço, a BFS pode ser compilada pelo numba (JIT).
+
+def build_csr(edges):
+    """
+    Converte o grafo {local: (vizinhos, ...)} para a representação CSR.
+    
+    Args:
+        edges: Dicionário representando o grafo {local: (vizinhos, ...)}
+        
+    Returns:
+        Uma tupla (nomes, ids, indptr, indices) onde nomes[i] é o local de
+        id i, ids é o mapa inverso {local: id} e indptr/indices são
+        array('i') no formato CSR
+    """
+    names = list(edges)
+    ids = {name: i for i, name in enumerate(names)}
+    # Locais que só aparecem como destino também recebem um id
+    for neighbors in edges.values():
+        for neighbor in neighbors:
+            if neighbor not in ids:
+                ids[neighbor] = len(names)
+                names.append(neighbor)
+    
+    indptr = array('i', [0])
+    indices = array('i')
+    for name in names:
+        indices.extend(ids[neighbor] for neighbor in edges.get(name, ()))
+        indptr.append(len(indices))
+    return names, ids, indptr, indices
+
+
+def _csr_from_pairs(locations, pairs):
+    """
+    Monta o grafo CSR direto dos pares (origem, destino) do :init.
+    
+    Mesmo resultado de build_csr(), sem passar por um dicionário de
+    adjacência: uma passada sobre os pares atribui ids e conta os graus de
+    saída, e uma segunda preenche os vizinhos em suas faixas.
+    
+    Args:
+        locations: Locais declarados em :objects (recebem os primeiros ids)
+        pairs: Lista de pares (origem, destino), possivelmente com repetições
+        
+    Returns:
+        Uma tupla (nomes, ids, indptr, indices), como build_csr()
+    """
+    # Conexões repetidas geram um único vizinho (como no grafo congelado)
+    pairs = list(dict.fromkeys(pairs))
+    
+    names = list(dict.fromkeys(locations))
+    ids = {name: i for i, name in enumerate(names)}
+    degree = [0] * len(names)
+    for a, b in pairs:
+        for name in (a, b):
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+                degree.append(0)
+        degree[ids[a]] += 1
+    
+    indptr = array('i', [0])
+    for d in degree:
+        indptr.append(indptr[-1] + d)
+    
+    indices = array('i', [0]) * len(pairs)
+    cursor = indptr[:-1]
+    for a, b in pairs:
+        k = ids[a]
+        indices[cursor[k]] = ids[b]
+        cursor[k] += 1
+    return names, ids, indptr, indices
+
+
+def _bfs_csr(indptr, indices, start, goal, parents, queue):
+    """
+    BFS sobre o grafo CSR, usando apenas inteiros e vetores pré-alocados.
+    
+    Escrita sem dicionários, closures ou alocações para ser compilável pelo
+    numba; sem ele, roda normalmente como Python puro.
+    
+    Args:
+        indptr, indices: Grafo no formato CSR (ver build_csr)
+        start, goal: Ids dos locais de partida e destino
+        parents: Vetor de predecessores, preenchido com -1 (não visitado)
+        queue: Vetor com espaço para todos os locais (fila circular não é
+               necessária: cada local entra no máximo uma vez)
+        
+    Returns:
+        True se o objetivo foi alcançado; parents permite reconstruir o caminho
+    """
+    parents[start] = start
+    queue[0] = start
+    head = 0
+    tail = 1
+    while head < tail:
+        node = queue[head]
+        head += 1
+        for k in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[k]
+            if parents[neighbor] == -1:
+                parents[neighbor] = node
+                if neighbor == goal:
+                    return True
+                queue[tail] = neighbor
+                tail += 1
+    return False
+
+
+# Tamanho mínimo do grafo (locais com conexões de saída) para usar a BFS
+# compilada. Importar o numba e carregar a função compilada custa ~0,4 s por
+# processo, mais que a BFS bidirecional em Python até ~300 mil locais
+CSR_MIN_LOCATIONS = 250_000
+
+
+@lru_cache(maxsize=1)
+def _jit_bfs_csr():
+    """
+    Retorna _bfs_csr compilada pelo numba, ou None se ele não está instalado.
+    
+    O numba (dependência opcional) só é importado na primeira chamada, ou
+    seja, apenas para grafos grandes o bastante para compensar o custo.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_bfs_csr)
+
+
+def csr_path(csr, start, goal):
+    """
+    Calcula o caminho mais curto sobre um grafo CSR (ver build_csr).
+    
+    Mesmo contrato de bfs_path(): retorna a lista de locais do início ao
+    objetivo, ou None se não houver caminho.
+    """
+    if start == goal:
+        return [start]
+    
+    names, ids, indptr, indices = csr
+    if start not in ids or goal not in ids:
+        return None
+    
+    n = len(names)
+    parents = array('i', [-1]) * n
+    queue = array('i', [0]) * n
+    goal_id = ids[goal]
+    bfs = _jit_bfs_csr() or _bfs_csr
+    if not bfs(indptr, indices, ids[start], goal_id, parents, queue):
+        return None
+    
+    # Reconstruir o caminho seguindo os predecessores (o início aponta
+    # para si mesmo)
+    path = [goal_id]
+    while parents[path[-1]] != path[-1]:
+        path.append(parents[path[-1]])
+    path.reverse()
+    return [names[i] for i in path]
+
+
+def humanize_location(name: str, custom_map: Optional[Dict[str, str]] = None) -> str:
     """
     Converte identificadores técnicos de locais para rótulos legíveis por humanos.
     
@@ -279,6 +724,7 @@ def humanize_location(name: str, custom_map: Dict[str, str]) -> str:
         name: Identificador técnico do local (formato ASCII, sem acentos)
         custom_map: Dicionário de mapeamento customizado para casos especiais
                     onde é necessário adicionar acentuação ou formatação específica
+                    (padrão: _PRETTY_MAP, o mesmo usado na saída JSON)
         
     Returns:
         String formatada para apresentação ao usuário
@@ -294,6 +740,9 @@ def humanize_location(name: str, custom_map: Dict[str, str]) -> str:
         2. Caso contrário, substitui underscores por espaços
         3. Mantém lowercase (padrão para APIs REST)
     """
+    if custom_map is None:
+        custom_map = _PRETTY_MAP
+    
     # Primeiro: verificar se existe tradução customizada
     # (necessário para adicionar acentuação em português)
     if name in custom_map:
@@ -311,40 +760,48 @@ def main():
         sys.exit(2)
 
     problem_file = sys.argv[1]
+    
+    # Ler as flags em uma única passada pelos argumentos
+    api_mode = verbose_api = False
+    for arg in sys.argv[2:]:
+        if arg == "--api":
+            api_mode = True
+        elif arg == "--verbose-api":
+            api_mode = verbose_api = True
+    
     try:
-        robot, start, goal, edges = parse_problem(problem_file)
+        robot, start, goal, edges, rev_edges, csr = _load_problem(problem_file)
     except Exception as e:
         print(f"[ERROR] {e}")
         sys.exit(1)
 
-    path = bfs_path(edges, start, goal)
+    # Em grafos grandes com numba, a BFS compilada sobre CSR; nos demais
+    # casos, a BFS bidirecional em Python puro
+    if csr is not None:
+        path = csr_path(csr, start, goal)
+    else:
+        path = bfs_path(edges, start, goal, rev_edges)
     if path is None:
         result = {
             "task": "navigate",
             "destination": goal,
             "status": "no_path",
         }
-        print(json.dumps(result, ensure_ascii=False))
+        sys.stdout.write(_dumps(result) + "\n")
         sys.exit(1)
 
     # Default: emit simple per-step JSON lines
-    pretty_map = {
-        "farmacia": "farmácia",
-        "recepcao": "recepção",
-        "corredor_central": "corredor central",
-        "corredor_ala_1": "corredor ala 1",
-        "corredor_ala_2": "corredor ala 2",
-        "corredor_ala_3": "corredor ala 3",
-        "sala_cirurgia": "sala de cirurgia",
-    }
-    for a, b in zip(path, path[1:]):
-        dest_label = pretty_map.get(b, b.replace("_", " "))
+    # (montadas em memória e escritas com um único write no stdout)
+    lines = []
+    for b in path[1:]:
+        dest_label = _PRETTY_MAP[b] if b in _PRETTY_MAP else b.replace("_", " ")
         result = {
             "task": "navigate",
             "destination": b,
             "destination_label": dest_label,
         }
-        print(json.dumps(result, ensure_ascii=False))
+        lines.append(_dumps(result) + "\n")
+    sys.stdout.write("".join(lines))
 
 
 if __name__ == "__main__":
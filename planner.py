@@ -17,6 +17,9 @@ OPÇÕES:
     --list-formats      Listar formatos disponíveis
     --config            Mostrar configuração atual
     --debug             Modo debug
+    --problems P1,P2    Resolver vários problemas em paralelo
+    --no-cache          Ignorar o cache persistente de planos
+    --clear-cache       Limpar o cache persistente de planos
 
 EXEMPLOS:
     # Execução básica
@@ -28,6 +31,9 @@ EXEMPLOS:
     # Salvar em arquivo
     python planner.py unified-planning hospital 01 save plano.txt
     
+    # Vários problemas em paralelo
+    python planner.py mock hospital --problems 01,02 raw
+    
     # Listar opções
     python planner.py --list-planners
 
@@ -36,10 +42,12 @@ EXEMPLOS:
 
 import sys
 import os
+import asyncio
 import subprocess
 import argparse
 from pathlib import Path
 from settings import *
+from planners import plan_cache
 
 
 class PlannerSystem:
@@ -47,6 +55,16 @@ class PlannerSystem:
     
     def __init__(self):
         self.config = self._load_config()
+        # Acesso direto às tabelas de configuração e conjuntos de chaves válidas
+        self.planners = self.config['planners']
+        self.domains = self.config['domains']
+        self.problems = self.config['problems']
+        self.formats = self.config['formats']
+        self._planner_keys = frozenset(self.planners)
+        self._domain_keys = frozenset(self.domains)
+        self._problem_keys = frozenset(self.problems)
+        self._format_keys = frozenset(self.formats)
+        self._venv_bin, self._venv_env = self._build_venv_env()
     
     def _load_config(self):
         """Carrega configurações do settings.py"""
@@ -59,15 +77,31 @@ class PlannerSystem:
             'default_format': DEFAULT_FORMAT,
             'venv_path': VENV_PATH,
             'timeout': EXECUTION_TIMEOUT,
-            'debug': DEBUG_MODE
+            'debug': DEBUG_MODE,
+            'use_cache': USE_PLAN_CACHE,
+            'exec_planner': EXEC_PLANNER
+        }
+    
+    def _build_venv_env(self):
+        """Calcula uma vez o ambiente equivalente a 'source .venv/bin/activate'"""
+        venv_bin = Path(self.config['venv_path']).parent.absolute()
+        env = {
+            **os.environ,
+            "VIRTUAL_ENV": str(venv_bin.parent),
+            "PATH": f"{venv_bin}{os.pathsep}{os.environ.get('PATH', '')}",
         }
+        env.pop("PYTHONHOME", None)
+        return venv_bin, env
+    
+    def _colored(self, message, color="reset"):
+        """Formata uma linha colorida (com quebra de linha) se suportado"""
+        if color in COLORS:
+            return f"{COLORS[color]}{message}{COLORS['reset']}\n"
+        return f"{message}\n"
     
     def _print_colored(self, message, color="reset"):
         """Imprime mensagem colorida se suportado"""
-        if color in COLORS:
-            print(f"{COLORS[color]}{message}{COLORS['reset']}")
-        else:
-            print(message)
+        sys.stdout.write(self._colored(message, color))
     
     def _validate_environment(self):
         """Valida se o ambiente está configurado corretamente"""
@@ -78,48 +112,48 @@ class PlannerSystem:
         return True
     
     def _validate_files(self, domain_file, problem_file):
-        """Valida se os arquivos existem"""
+        """Valida se os arquivos existem (um único stat por arquivo)"""
         if VALIDATE_FILES:
-            if not os.path.exists(domain_file):
-                self._print_colored(f"{SYMBOLS['error']} Domínio não encontrado: {domain_file}", "error")
-                return False
-            
-            if not os.path.exists(problem_file):
-                self._print_colored(f"{SYMBOLS['error']} Problema não encontrado: {problem_file}", "error")
-                return False
+            for label, path in (("Domínio", domain_file), ("Problema", problem_file)):
+                try:
+                    os.stat(path)
+                except FileNotFoundError:
+                    self._print_colored(f"{SYMBOLS['error']} {label} não encontrado: {path}", "error")
+                    return False
+                except OSError:
+                    # Outros erros (permissão etc.) são relatados pelo próprio planner
+                    pass
         return True
     
     def list_planners(self):
         """Lista planners disponíveis"""
-        self._print_colored(f"{SYMBOLS['info']} Planners Disponíveis:", "info")
-        for key, config in self.config['planners'].items():
+        parts = [self._colored(f"{SYMBOLS['info']} Planners Disponíveis:", "info")]
+        for key, config in self.planners.items():
             default_mark = " (padrão)" if key == self.config['default_planner'] else ""
-            print(f"  {key:<15} - {config['name']}{default_mark}")
-            print(f"    {config['description']}")
+            parts.append(f"  {key:<15} - {config['name']}{default_mark}\n    {config['description']}\n")
+        sys.stdout.write("".join(parts))
     
     def list_domains(self):
         """Lista domínios disponíveis"""
-        self._print_colored(f"{SYMBOLS['info']} Domínios Disponíveis:", "info")
-        for key, config in self.config['domains'].items():
-            print(f"  {key:<10} - {config['name']}")
-            print(f"    {config['description']}")
-            print(f"    Arquivo: {config['file']}")
+        parts = [self._colored(f"{SYMBOLS['info']} Domínios Disponíveis:", "info")]
+        for key, config in self.domains.items():
+            parts.append(f"  {key:<10} - {config['name']}\n    {config['description']}\n    Arquivo: {config['file']}\n")
+        sys.stdout.write("".join(parts))
     
     def list_problems(self):
         """Lista problemas disponíveis"""
-        self._print_colored(f"{SYMBOLS['info']} Problemas Disponíveis:", "info")
-        for key, config in self.config['problems'].items():
-            print(f"  {key:<5} - {config['name']}")
-            print(f"    {config['description']}")
-            print(f"    Arquivo: {config['file']}")
+        parts = [self._colored(f"{SYMBOLS['info']} Problemas Disponíveis:", "info")]
+        for key, config in self.problems.items():
+            parts.append(f"  {key:<5} - {config['name']}\n    {config['description']}\n    Arquivo: {config['file']}\n")
+        sys.stdout.write("".join(parts))
     
     def list_formats(self):
         """Lista formatos disponíveis"""
-        self._print_colored(f"{SYMBOLS['info']} Formatos Disponíveis:", "info")
-        for key, config in self.config['formats'].items():
+        parts = [self._colored(f"{SYMBOLS['info']} Formatos Disponíveis:", "info")]
+        for key, config in self.formats.items():
             default_mark = " (padrão)" if key == self.config['default_format'] else ""
-            print(f"  {key:<10} - {config['name']}{default_mark}")
-            print(f"    {config['description']}")
+            parts.append(f"  {key:<10} - {config['name']}{default_mark}\n    {config['description']}\n")
+        sys.stdout.write("".join(parts))
     
     def show_config(self):
         """Mostra configuração atual"""
@@ -127,51 +161,67 @@ class PlannerSystem:
         print(f"  Planner padrão: {self.config['default_planner']}")
         print(f"  Formato padrão: {self.config['default_format']}")
         print(f"  Ambiente virtual: {self.config['venv_path']}")
-        print(f"  Timeout: {self.config['timeout']}s")
+        if self._exec_planner_active():
+            print("  Execução: os.execvpe (substitui o processo; sem timeout)")
+        else:
+            print(f"  Execução: subprocesso (timeout: {self.config['timeout']}s)")
         print(f"  Debug: {'Ativado' if self.config['debug'] else 'Desativado'}")
+        print(f"  Cache de planos: {'Ativado' if self.config['use_cache'] else 'Desativado'} ({plan_cache.CACHE_DIR})")
     
-    def run_planner(self, planner_key, domain_key, problem_key, format_key="json", output_file=None):
-        """Executa o planner com as configurações especificadas"""
+    def _exec_planner_active(self):
+        """Indica se a CLI substitui o processo pelo planner (EXEC_PLANNER, só em POSIX)"""
+        return bool(self.config['exec_planner']) and os.name == "posix"
+    
+    def clear_cache(self):
+        """Remove todos os planos do cache persistente"""
+        removed = plan_cache.clear()
+        self._print_colored(f"{SYMBOLS['success']} Cache de planos limpo ({removed} planos removidos)", "success")
+    
+    def _build_command(self, planner_key, domain_key, problem_key, format_key="json", output_file=None):
+        """Valida as chaves e monta o comando do planner (None se inválido)"""
         
         # Validar planner
-        if planner_key not in self.config['planners']:
+        if planner_key not in self._planner_keys:
             self._print_colored(f"{SYMBOLS['error']} Planner inválido: {planner_key}", "error")
-            return False
+            return None
         
         # Validar domínio
-        if domain_key not in self.config['domains']:
+        if domain_key not in self._domain_keys:
             self._print_colored(f"{SYMBOLS['error']} Domínio inválido: {domain_key}", "error")
-            return False
+            return None
         
         # Validar problema
-        if problem_key not in self.config['problems']:
+        if problem_key not in self._problem_keys:
             self._print_colored(f"{SYMBOLS['error']} Problema inválido: {problem_key}", "error")
-            return False
+            return None
         
         # Validar formato
-        if format_key not in self.config['formats']:
+        if format_key not in self._format_keys:
             self._print_colored(f"{SYMBOLS['error']} Formato inválido: {format_key}", "error")
-            return False
+            return None
         
         # Obter configurações
-        planner_config = self.config['planners'][planner_key]
-        domain_config = self.config['domains'][domain_key]
-        problem_config = self.config['problems'][problem_key]
-        format_config = self.config['formats'][format_key]
+        planner_config = self.planners[planner_key]
+        format_config = self.formats[format_key]
         
         # Construir caminhos dos arquivos
-        domain_file = domain_config['file']
-        problem_file = problem_config['file']
+        domain_file = self.domains[domain_key]['file']
+        problem_file = self.problems[problem_key]['file']
         
         # Validar ambiente e arquivos
         if not self._validate_environment():
-            return False
+            return None
         
-        if not self._validate_files(domain_file, problem_file):
-            return False
+        # Planners no venv rodam em subprocesso e já relatam arquivos ausentes
+        # ao abri-los; validar aqui seria um stat extra por arquivo
+        if not planner_config['requires_venv'] and not self._validate_files(domain_file, problem_file):
+            return None
         
         # Construir comando
         cmd = planner_config['command'].copy()
+        if planner_config['requires_venv'] and cmd[0] == "python":
+            # Usar diretamente o Python do ambiente virtual
+            cmd[0] = str(self._venv_bin / "python")
         
         # Adicionar argumentos específicos do planner
         if planner_key == "mock":
@@ -183,12 +233,37 @@ class PlannerSystem:
         
         cmd.extend(planner_config['args'])
         
+        # O mock planner não usa o cache de planos
+        if planner_key != "mock" and not self.config['use_cache']:
+            cmd.append("--no-cache")
+        
         # Adicionar argumentos de formato
         if format_config['raw_flag']:
             cmd.append("--raw")
         elif format_key == "save" and output_file:
             cmd.extend(["--output", output_file])
         
+        return cmd
+    
+    def run_planner(self, planner_key, domain_key, problem_key, format_key="json", output_file=None,
+                    replace_process=False):
+        """Executa o planner com as configurações especificadas
+        
+        Com replace_process=True (uso pela CLI), o processo atual é substituído
+        pelo planner via os.execvpe e este método não retorna.
+        """
+        
+        cmd = self._build_command(planner_key, domain_key, problem_key, format_key, output_file)
+        if cmd is None:
+            return False
+        
+        planner_config = self.planners[planner_key]
+        domain_config = self.domains[domain_key]
+        problem_config = self.problems[problem_key]
+        format_config = self.formats[format_key]
+        domain_file = domain_config['file']
+        problem_file = problem_config['file']
+        
         # Executar
         self._print_colored(f"{SYMBOLS['running']} Executando planner...", "info")
         if self.config['debug']:
@@ -201,15 +276,20 @@ class PlannerSystem:
             self._print_colored(f"  Comando: {' '.join(cmd)}", "info")
         
         try:
-            # Executar com ambiente virtual se necessário
-            if planner_config['requires_venv']:
-                full_cmd = ["bash", "-lc", f"source {self.config['venv_path']} && {' '.join(cmd)}"]
-            else:
-                full_cmd = cmd
+            # Executar com ambiente virtual se necessário (sem 'bash -lc source ...')
+            env = self._venv_env if planner_config['requires_venv'] else None
+            
+            if replace_process and self._exec_planner_active():
+                # Nada a fazer depois do planner: ele assume este processo
+                # (o código de saída passa a ser o dele; sem timeout)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.execvpe(cmd[0], cmd, env if env is not None else os.environ)
             
             result = subprocess.run(
-                full_cmd,
+                cmd,
                 cwd=os.getcwd(),
+                env=env,
                 timeout=self.config['timeout']
             )
             
@@ -226,6 +306,68 @@ class PlannerSystem:
         except Exception as e:
             self._print_colored(f"{SYMBOLS['error']} Erro: {e}", "error")
             return False
+    
+    async def _run_async(self, cmd, env=None):
+        """Executa um comando sem bloquear o loop, capturando a saída padrão"""
+        process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, env=env)
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.config['timeout'])
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return None, b""
+        return process.returncode, stdout
+    
+    async def solve_many(self, planner_key, domain_key, problem_keys, format_key="json", output_file=None):
+        """Executa o planner para vários problemas em paralelo (um processo por problema)"""
+        
+        if not problem_keys:
+            self._print_colored(f"{SYMBOLS['error']} Nenhum problema informado", "error")
+            return False
+        
+        # Montar todos os comandos antes de executar qualquer um
+        commands = []
+        for problem_key in problem_keys:
+            problem_output = None
+            if output_file:
+                # Um arquivo por problema: plano.txt -> plano_01.txt
+                base, ext = os.path.splitext(output_file)
+                problem_output = f"{base}_{problem_key}{ext}"
+            cmd = self._build_command(planner_key, domain_key, problem_key, format_key, problem_output)
+            if cmd is None:
+                return False
+            commands.append((problem_key, cmd))
+        
+        env = self._venv_env if self.planners[planner_key]['requires_venv'] else None
+        
+        self._print_colored(f"{SYMBOLS['running']} Executando planner para {len(commands)} problemas...", "info")
+        if self.config['debug']:
+            for problem_key, cmd in commands:
+                self._print_colored(f"  Comando ({problem_key}): {' '.join(cmd)}", "info")
+        
+        try:
+            results = await asyncio.gather(*(self._run_async(cmd, env) for _, cmd in commands))
+        except Exception as e:
+            self._print_colored(f"{SYMBOLS['error']} Erro: {e}", "error")
+            return False
+        
+        # Mostrar as saídas na ordem pedida, sem intercalar processos
+        success = True
+        for (problem_key, _), (returncode, stdout) in zip(commands, results):
+            self._print_colored(f"{SYMBOLS['info']} Problema {problem_key}:", "info")
+            sys.stdout.flush()
+            sys.stdout.buffer.write(stdout)
+            sys.stdout.buffer.flush()
+            if returncode is None:
+                self._print_colored(f"{SYMBOLS['error']} Timeout na execução ({self.config['timeout']}s)", "error")
+                success = False
+            elif returncode != 0:
+                self._print_colored(f"{SYMBOLS['error']} Erro na execução (código: {returncode})", "error")
+                success = False
+        
+        if success:
+            self._print_colored(f"{SYMBOLS['success']} Execução concluída com sucesso!", "success")
+        return success
 
 
 def main():
@@ -243,15 +385,18 @@ def main():
     parser.add_argument("--list-formats", action="store_true", help="Listar formatos disponíveis")
     parser.add_argument("--config", action="store_true", help="Mostrar configuração atual")
     parser.add_argument("--debug", action="store_true", help="Ativar modo debug")
+    parser.add_argument("--problems", help="Lista de problemas separados por vírgula (execução em paralelo)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorar o cache persistente de planos")
+    parser.add_argument("--clear-cache", action="store_true", help="Limpar o cache persistente de planos")
     
     # Argumentos posicionais
     parser.add_argument("planner", nargs="?", help="Planner a usar")
     parser.add_argument("domain", nargs="?", help="Domínio a usar")
     parser.add_argument("problem", nargs="?", help="Problema a usar")
-    parser.add_argument("format", nargs="?", default="json", help="Formato de saída")
+    parser.add_argument("format", nargs="?", help="Formato de saída")
     parser.add_argument("output_file", nargs="?", help="Arquivo de saída (para formato 'save')")
     
-    args = parser.parse_args()
+    args = parser.parse_intermixed_args()
     
     # Criar sistema
     system = PlannerSystem()
@@ -260,6 +405,14 @@ def main():
     if args.debug:
         system.config['debug'] = True
     
+    if args.no_cache:
+        system.config['use_cache'] = False
+    
+    if args.clear_cache:
+        system.clear_cache()
+        if not args.planner:
+            return
+    
     # Processar opções de listagem
     if args.list_planners:
         system.list_planners()
@@ -281,6 +434,28 @@ def main():
         system.show_config()
         return
     
+    # Vários problemas: os posicionais após o domínio passam a ser formato e arquivo
+    if args.problems:
+        if not args.planner or not args.domain:
+            parser.print_help()
+            return
+        problem_keys = [key.strip() for key in args.problems.split(",") if key.strip()]
+        if not problem_keys:
+            parser.error("--problems: nenhum problema informado (ex: --problems 01,02)")
+        if args.problem in system.problems and args.problem not in system.formats:
+            parser.error(
+                f"o problema '{args.problem}' não pode ser posicional junto com --problems; "
+                f"inclua-o na lista (--problems {','.join(problem_keys + [args.problem])})"
+            )
+        success = asyncio.run(system.solve_many(
+            args.planner,
+            args.domain,
+            problem_keys,
+            args.problem or system.config['default_format'],
+            args.format
+        ))
+        sys.exit(0 if success else 1)
+    
     # Verificar se argumentos necessários foram fornecidos
     if not args.planner or not args.domain or not args.problem:
         parser.print_help()
@@ -295,8 +470,9 @@ def main():
         args.planner,
         args.domain, 
         args.problem,
-        args.format,
-        args.output_file
+        args.format or system.config['default_format'],
+        args.output_file,
+        replace_process=system.config['exec_planner']
     )
     
     sys.exit(0 if success else 1)
@@ -8,29 +8,248 @@ Supports:
 """
 
 import os
+import re
+import mmap
 import sys
+import atexit
+import weakref
+import operator
+import contextlib
+import functools
 import subprocess
-import tempfile
-import json
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-import shutil
+from types import MappingProxyType
+from importlib.util import find_spec
+from typing import Any, List, Dict, Optional, Tuple
+# asyncio, concurrent.futures, tempfile and traceback are imported where used
+# (batch solves, the Fast Downward binary fallback, PDDL_DEBUG errors), so
+# --list-planners and cache hits do not load them. json is not deferred:
+# plan_cache needs it and is imported below
+
+try:
+    import plan_cache
+except ImportError:  # imported as planners.pddl_planner
+    from planners import plan_cache
+
+
+def _load_location_labels() -> Dict[str, str]:
+    """LOCATION_LABELS of the project's settings.py, loaded by path.
+
+    The planners are run as planners/pddl_planner.py, where the project
+    root is not on sys.path (and another "settings" module may be), so
+    the file next to this package is loaded directly.
+    """
+    from importlib.util import spec_from_file_location, module_from_spec
+    settings_file = Path(__file__).resolve().parent.parent / "settings.py"
+    spec = spec_from_file_location("_pddl_project_settings", settings_file)
+    settings = module_from_spec(spec)
+    spec.loader.exec_module(settings)
+    return settings.LOCATION_LABELS
+
+
+@functools.lru_cache(maxsize=1024)
+def _windows_to_wsl_path(windows_path: str) -> str:
+    """Convert Windows path to WSL path (memoized: the same files recur across solves)"""
+    # Textual absolute path (cwd join + normalisation): no filesystem access,
+    # unlike Path.resolve(), and drive-letter translation needs nothing more
+    path_str = os.path.abspath(windows_path)
+    
+    # Convert C:\Users\... to /mnt/c/Users/...
+    if len(path_str) >= 2 and path_str[1] == ':':
+        drive = path_str[0].lower()
+        rest = path_str[2:].replace('\\', '/')
+        return f"/mnt/{drive}{rest}"
+    
+    return path_str.replace('\\', '/')
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_up_problem_cached(domain_bytes: bytes, problem_bytes: bytes):
+    """Parse PDDL sources with unified-planning's PDDLReader (cached on contents)"""
+    from unified_planning.io import PDDLReader
+    
+    reader = PDDLReader()
+    if hasattr(reader, 'parse_problem_string'):
+        # Decoding here keeps the UTF-8 sources independent of the
+        # platform's default encoding, with no temporary files
+        return reader.parse_problem_string(
+            domain_bytes.decode('utf-8-sig'),
+            problem_bytes.decode('utf-8-sig')
+        )
+    
+    # Older unified-planning: the reader only takes paths, so write
+    # byte-exact copies into one temporary directory
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmpdir:
+        domain_path = os.path.join(tmpdir, "domain.pddl")
+        problem_path = os.path.join(tmpdir, "problem.pddl")
+        with open(domain_path, 'wb') as f:
+            f.write(domain_bytes)
+        with open(problem_path, 'wb') as f:
+            f.write(problem_bytes)
+        return reader.parse_problem(domain_path, problem_path)
+
+
+def _write_plan(output_file: str, plan: List[str]) -> None:
+    """Write one action per line through a large buffer, without joining the plan first"""
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20, newline='\n') as f:
+        f.writelines(f"{action}\n" for action in plan)
+
+
+# Action line of a Fast Downward plan file, "(...)" without surrounding blanks;
+# matched on the raw bytes so the file is never decoded as a whole
+_PLAN_LINE_RE = re.compile(rb'^[ \t]*(\([^;\n][^\n]*?\))[ \t\r]*$', re.MULTILINE)
+
+# unified-planning result statuses that carry a plan
+_UP_SOLVED = frozenset({"SOLVED_SATISFICING", "SOLVED_OPTIMALLY"})
+
+# pyperplan searches that take no heuristic (as in pyperplan's own CLI)
+_UNINFORMED_SEARCHES = frozenset({"bfs", "ids", "sat"})
+
+
+@functools.lru_cache(maxsize=1)
+def _pyperplan_api():
+    """pyperplan's (SEARCHES, HEURISTICS, Parser, grounding), imported on first use only"""
+    from pyperplan.planner import SEARCHES, HEURISTICS
+    from pyperplan.pddl.parser import Parser
+    from pyperplan import grounding
+    return SEARCHES, HEURISTICS, Parser, grounding
+
+
+def _error_message(message: str) -> str:
+    """Append the current traceback to message only when PDDL_DEBUG is set"""
+    if os.environ.get("PDDL_DEBUG"):
+        import traceback
+        return f"{message}\n{traceback.format_exc()}"
+    return message
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_available_planners_cached() -> Tuple[str, ...]:
+    """Detect which planners are available
+    
+    Cached for the process lifetime: the binary probe is expensive and the
+    result does not change while the program runs. Libraries are only
+    located (find_spec), not imported: importing them is the slow part and
+    is left to the first solve.
+    """
+    available = []
+    
+    # Check for Fast Downward
+    if _check_fast_downward():
+        available.append("fast-downward")
+    
+    # Check for Unified Planning
+    if find_spec("unified_planning") is not None:
+        available.append("unified-planning")
+    
+    # Check for Pyperplan
+    if find_spec("pyperplan") is not None:
+        available.append("pyperplan")
+    
+    return tuple(available)
+
+
+@functools.lru_cache(maxsize=1)
+def _check_fast_downward() -> bool:
+    """Check if Fast Downward is available.
+
+    Preference:
+    1) Python engine via unified-planning (up_fast_downward)
+    2) System binary (native/WSL)
+    """
+    # 1) Python engine via unified-planning (imported on the first solve; if
+    # it turns out unusable, _solve_fast_downward falls back to the binary)
+    if find_spec("up_fast_downward") is not None and find_spec("unified_planning") is not None:
+        return True
+
+    # 2-4) System binary (WSL, PATH or common install locations)
+    return _find_fast_downward_binary()[1] is not None
+
+
+# Common Fast Downward install locations (checked after PATH)
+_FD_SEARCH_DIRS = (Path.home() / "downward", Path("C:/downward"))
+
+
+@functools.lru_cache(maxsize=1)
+def _find_fast_downward_binary() -> Tuple[bool, Optional[str]]:
+    """Locate the Fast Downward binary: (use_wsl, fd_path), fd_path None if missing"""
+    import shutil
+    
+    # 2) Check system binary via WSL (only stdout, the binary's path, is read).
+    # WSL only exists on Windows hosts, so elsewhere (or when wsl.exe is not
+    # installed) no process is spawned
+    if sys.platform == "win32" and shutil.which("wsl"):
+        try:
+            result = subprocess.run(
+                ["wsl", "which", "fast-downward.py"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=5
+            )
+            if result.returncode == 0:
+                return True, result.stdout.decode(errors="replace").strip() or "fast-downward.py"
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+
+    # 3) Check native binary in PATH
+    fd_path = shutil.which("fast-downward.py")
+    if fd_path:
+        return False, fd_path
+
+    # 4) Common install locations (one stat each)
+    for path in _FD_SEARCH_DIRS:
+        fd_file = path / "fast-downward.py"
+        if fd_file.is_file():
+            return False, str(fd_file)
+
+    return False, None
 
 
 class PDDLPlanner:
     """Wrapper for PDDL planners with multiple backend support"""
     
     SUPPORTED_PLANNERS = ["fast-downward", "unified-planning", "pyperplan"]
+    SOLVE_MEMO_SIZE = 128
     
-    def __init__(self, planner_type: str = "auto"):
+    def __init__(
+        self,
+        planner_type: str = "auto",
+        use_cache: bool = True,
+        search: str = "wastar",
+        heuristic: str = "hff"
+    ):
         """
         Initialize planner
         
         Args:
             planner_type: "fast-downward", "unified-planning", "pyperplan", or "auto"
+            use_cache: Reuse plans from the persistent plan cache
+            search: pyperplan search ("wastar", "astar", "gbf", "bfs", ...)
+            heuristic: pyperplan heuristic ("hff", "lmcut", "hadd", ...)
         """
         self.planner_type = planner_type
+        self.use_cache = use_cache
+        self.search = search
+        self.heuristic = heuristic
+        # Fast Downward binary lookup (set by _probe_fast_downward_binary)
+        self._use_wsl = False
+        self._fd_path: Optional[str] = None
+        # Translated SAS files of the binary fallback, keyed by (domain, problem, mtimes)
+        self._sas_files: Dict[Tuple[str, str, int, int], str] = {}
+        self._sas_dir: Optional[str] = None
+        # Parent directory for _sas_dir (set in pool workers, see _init_worker)
+        self._sas_root: Optional[str] = None
+        self._sas_cleanup: Optional[weakref.finalize] = None
+        # Open unified-planning engines by name (see _warm_planner)
+        self._up_planners: Dict[str, Any] = {}
         self.available_planners = self._detect_available_planners()
+        # Parsed pyperplan domains, keyed by (kind, domain_file, mtime_ns)
+        # so one domain serves many problems
+        self._domain_cache: Dict[Tuple[str, str, int], Any] = {}
+        # Solved plans of this instance, keyed by (planner, files and mtimes)
+        self._solve_memo: "OrderedDict[Tuple, Tuple[str, ...]]" = OrderedDict()
         
         if planner_type == "auto":
             self.planner_type = self._select_best_planner()
@@ -41,79 +260,17 @@ class PDDLPlanner:
             )
     
     def _detect_available_planners(self) -> List[str]:
-        """Detect which planners are available"""
-        available = []
-        
-        # Check for Fast Downward
-        if self._check_fast_downward():
-            available.append("fast-downward")
-        
-        # Check for Unified Planning
-        try:
-            import unified_planning
-            available.append("unified-planning")
-        except ImportError:
-            pass
-        
-        # Check for Pyperplan
-        try:
-            import pyperplan
-            available.append("pyperplan")
-        except ImportError:
-            pass
-        
-        return available
+        """Detect which planners are available (memoized per process)"""
+        if os.environ.get("PDDL_PLANNER_REDETECT") == "1":
+            _detect_available_planners_cached.cache_clear()
+            _check_fast_downward.cache_clear()
+            _find_fast_downward_binary.cache_clear()
+        return list(_detect_available_planners_cached())
     
-    def _check_fast_downward(self) -> bool:
-        """Check if Fast Downward is available.
-
-        Preference:
-        1) Python engine via unified-planning (up_fast_downward)
-        2) System binary (native/WSL)
-        """
-        # 1) Python engine via unified-planning
-        try:
-            # Importing registers the engine if installed
-            import up_fast_downward  # type: ignore
-            from unified_planning.shortcuts import OneshotPlanner
-            try:
-                with OneshotPlanner(name='fast-downward'):
-                    return True
-            except Exception:
-                # Engine importable but not usable
-                pass
-        except Exception:
-            pass
-
-        # 2) Check system binary via WSL
-        try:
-            result = subprocess.run(
-                ["wsl", "which", "fast-downward.py"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                return True
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-
-        # 3) Check native binary in PATH
-        fd_path = shutil.which("fast-downward.py")
-        if fd_path:
-            return True
-
-        # 4) Common install locations
-        common_paths = [
-            Path.home() / "downward",
-            Path("C:/downward"),
-            Path("~/downward").expanduser(),
-        ]
-        for path in common_paths:
-            if (path / "fast-downward.py").exists():
-                return True
-
-        return False
+    def _probe_fast_downward_binary(self) -> bool:
+        """Locate the Fast Downward binary, setting _use_wsl and _fd_path"""
+        self._use_wsl, self._fd_path = _find_fast_downward_binary()
+        return self._fd_path is not None
     
     def _select_best_planner(self) -> str:
         """Select the best available planner"""
@@ -130,6 +287,12 @@ class PDDLPlanner:
         
         return self.available_planners[0]
     
+    def _cache_label(self) -> str:
+        """Planner name used in plan-cache keys (includes pyperplan's configuration)"""
+        if self.planner_type == "pyperplan":
+            return f"pyperplan+{self.search}+{self.heuristic}"
+        return self.planner_type
+    
     def solve(
         self,
         domain_file: str,
@@ -148,14 +311,138 @@ class PDDLPlanner:
             (success, plan_actions, error_message)
             plan_actions: List of action strings like "(navigate robo base farmacia)"
         """
+        # In-process memo: a repeated (domain, problem) pair skips even hashing
+        try:
+            memo_key = (
+                self._cache_label(),
+                domain_file, os.stat(domain_file).st_mtime_ns,
+                problem_file, os.stat(problem_file).st_mtime_ns,
+            )
+        except FileNotFoundError as e:
+            return False, None, str(e)
+        except OSError:
+            memo_key = None
+        memoized = self._solve_memo.get(memo_key) if memo_key else None
+        if memoized is not None:
+            self._solve_memo.move_to_end(memo_key)
+            if output_file:
+                _write_plan(output_file, memoized)
+            return True, list(memoized), None
+        
+        cache_key = None
+        if self.use_cache:
+            try:
+                cache_key = plan_cache.make_key(self._cache_label(), domain_file, problem_file)
+            except FileNotFoundError as e:
+                # Hashing is the first read of both files, so it doubles as validation
+                return False, None, str(e)
+            except OSError:
+                cache_key = None
+            cached = plan_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                if output_file:
+                    _write_plan(output_file, cached)
+                if memo_key:
+                    self._remember(memo_key, cached)
+                return True, cached, None
+        
         if self.planner_type == "fast-downward":
-            return self._solve_fast_downward(domain_file, problem_file, output_file)
+            result = self._solve_fast_downward(domain_file, problem_file, output_file)
         elif self.planner_type == "unified-planning":
-            return self._solve_unified_planning(domain_file, problem_file, output_file)
+            result = self._solve_unified_planning(domain_file, problem_file, output_file)
         elif self.planner_type == "pyperplan":
-            return self._solve_pyperplan(domain_file, problem_file, output_file)
+            result = self._solve_pyperplan(domain_file, problem_file, output_file)
         else:
             return False, None, f"Unknown planner type: {self.planner_type}"
+        
+        success, plan, _ = result
+        if success and plan is not None:
+            if cache_key:
+                plan_cache.put(cache_key, plan)
+            if memo_key:
+                self._remember(memo_key, plan)
+        return result
+    
+    def _remember(self, memo_key: Tuple, plan: List[str]) -> None:
+        """Store a solved plan in the bounded in-process memo (LRU eviction)"""
+        self._solve_memo[memo_key] = tuple(plan)
+        self._solve_memo.move_to_end(memo_key)
+        if len(self._solve_memo) > self.SOLVE_MEMO_SIZE:
+            self._solve_memo.popitem(last=False)
+    
+    @contextlib.contextmanager
+    def _process_pool(self, n_jobs: int, max_workers: Optional[int] = None):
+        """Process pool whose workers each build (and warm) one planner up front.
+        
+        Workers exit through os._exit, skipping atexit and finalizers, so
+        their translator output goes under a directory owned by the pool,
+        removed once the workers have stopped.
+        """
+        import tempfile
+        import concurrent.futures
+        with tempfile.TemporaryDirectory(prefix="pddl_sas_") as sas_root:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers or min(n_jobs, os.cpu_count() or 1),
+                initializer=_init_worker,
+                initargs=(self.planner_type, self.use_cache, self.search, self.heuristic, sas_root)
+            ) as pool:
+                yield pool
+    
+    def solve_jobs(
+        self,
+        jobs: List[Tuple[str, str, Optional[str]]],
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[bool, Optional[List[str]], Optional[str]]]:
+        """
+        Solve independent (domain, problem, output_file) jobs in parallel
+        
+        Args:
+            jobs: (domain_file, problem_file, output_file or None) per job
+            max_workers: Worker processes (default: one per CPU, at most one per job)
+        
+        Returns:
+            One (success, plan_actions, error_message) per job, in order
+        """
+        if not jobs:
+            return []
+        
+        with self._process_pool(len(jobs), max_workers) as pool:
+            return list(pool.map(_solve_one, *zip(*jobs)))
+    
+    async def solve_many(
+        self,
+        domain_file: str,
+        problem_files: List[str],
+        output_dir: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[bool, Optional[List[str]], Optional[str]]]:
+        """
+        Solve several problems of one domain without blocking the event loop
+        
+        Runs solve_jobs (which owns the process pool) in a thread, so the
+        caller can await it alongside other work.
+        
+        Args:
+            domain_file: Path to domain PDDL file
+            problem_files: Paths to problem PDDL files
+            output_dir: Optional directory to save each plan as <problem>.plan
+            max_workers: Worker processes (default: one per CPU, at most one per problem)
+        
+        Returns:
+            One (success, plan_actions, error_message) per problem, in order
+        """
+        import asyncio
+        
+        jobs = [
+            (
+                domain_file,
+                problem_file,
+                os.path.join(output_dir, f"{Path(problem_file).stem}.plan") if output_dir else None
+            )
+            for problem_file in problem_files
+        ]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.solve_jobs, jobs, max_workers)
     
     def _solve_fast_downward(
         self,
@@ -168,41 +455,16 @@ class PDDLPlanner:
         Prefer the unified-planning engine (up_fast_downward). If not available,
         fall back to system binary (native/WSL).
         """
+        import tempfile
+
         # Try via unified-planning engine first
         try:
-            from unified_planning.shortcuts import OneshotPlanner, get_environment
-            from unified_planning.io import PDDLReader
-            # Disable credits output
-            get_environment().credits_stream = None
-
-            # Read with UTF-8 and pass to UP reader to avoid encoding issues
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.pddl', delete=False) as temp_domain:
-                with open(domain_file, 'r', encoding='utf-8') as df:
-                    temp_domain.write(df.read())
-                temp_domain_path = temp_domain.name
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.pddl', delete=False) as temp_problem:
-                with open(problem_file, 'r', encoding='utf-8') as pf:
-                    temp_problem.write(pf.read())
-                temp_problem_path = temp_problem.name
-
-            try:
-                reader = PDDLReader()
-                problem = reader.parse_problem(temp_domain_path, temp_problem_path)
-                with OneshotPlanner(name='fast-downward') as planner:
-                    result = planner.solve(problem)
-                if result.status.name in ['SOLVED_SATISFICING', 'SOLVED_OPTIMALLY']:
-                    plan = self._convert_up_plan_to_pddl(result.plan)
-                    if output_file:
-                        with open(output_file, 'w') as f:
-                            f.write('\n'.join(plan))
-                    return True, plan, None
-                return False, None, f"No solution found: {result.status.name}"
-            finally:
-                try:
-                    os.unlink(temp_domain_path)
-                    os.unlink(temp_problem_path)
-                except Exception:
-                    pass
+            return self._solve_via_up('fast-downward', domain_file, problem_file, output_file)
+        except FileNotFoundError as e:
+            # A missing input is reported as is; any other missing file (e.g.
+            # the engine's own binary) falls back to the system binary below
+            if e.filename in (domain_file, problem_file):
+                return False, None, str(e)
         except Exception:
             # If unified-planning engine not available, try system binary as fallback
             pass
@@ -211,56 +473,106 @@ class PDDLPlanner:
         with tempfile.TemporaryDirectory() as tmpdir:
             plan_file = output_file or os.path.join(tmpdir, "plan.txt")
 
-            use_wsl = False
+            if not self._probe_fast_downward_binary():
+                return False, None, "Fast Downward binary not found"
+
+            # Reuse the translator output of an earlier solve of this pair:
+            # the driver then skips translation and only runs the search
             try:
-                result = subprocess.run(
-                    ["wsl", "which", "fast-downward.py"],
-                    capture_output=True,
-                    timeout=5
+                sas_key = (
+                    domain_file, problem_file,
+                    os.stat(domain_file).st_mtime_ns, os.stat(problem_file).st_mtime_ns
                 )
-                use_wsl = result.returncode == 0
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                pass
-
-            if use_wsl:
-                domain_wsl = self._windows_to_wsl_path(domain_file)
-                problem_wsl = self._windows_to_wsl_path(problem_file)
-                plan_wsl = self._windows_to_wsl_path(plan_file)
-                cmd = [
-                    "wsl",
-                    "fast-downward.py",
-                    domain_wsl,
-                    problem_wsl,
-                    "--search", "astar(lmcut())",
-                    "--plan-file", plan_wsl
-                ]
+            except OSError as e:
+                return False, None, f"Error running Fast Downward: {str(e)}"
+            sas_file = self._sas_files.get(sas_key)
+            if sas_file and os.path.exists(sas_file):
+                paths = [plan_file, sas_file]
+                translated = True
             else:
-                cmd = [
-                    "fast-downward.py",
-                    domain_file,
-                    problem_file,
-                    "--search", "astar(lmcut())",
-                    "--plan-file", plan_file
-                ]
+                sas_file = os.path.join(self._get_sas_dir(), f"{len(self._sas_files)}.sas")
+                paths = [plan_file, sas_file, domain_file, problem_file]
+                translated = False
+            
+            # Driver options (--plan-file, --sas-file) must precede the inputs
+            if self._use_wsl:
+                paths = [self._windows_to_wsl_path(p) for p in paths]
+                cmd = ["wsl", self._fd_path]
+            else:
+                cmd = [self._fd_path]
+            cmd += ["--plan-file", paths[0]]
+            if translated:
+                cmd.append(paths[1])
+            else:
+                cmd += ["--sas-file", paths[1], paths[2], paths[3]]
+            cmd += ["--search", "astar(lmcut())"]
 
             try:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-                if result.returncode == 0 and os.path.exists(plan_file):
-                    with open(plan_file, 'r') as f:
-                        plan = self._parse_fast_downward_plan(f.read())
+                finished, returncode, log_tail = self._run_fast_downward(cmd)
+                if finished is None:
+                    return False, None, "Planner timeout (60s)"
+                if (finished or returncode == 0) and os.path.exists(plan_file):
+                    if not translated and os.path.exists(sas_file):
+                        self._sas_files[sas_key] = sas_file
+                    plan = self._read_fast_downward_plan(plan_file)
+                    if output_file:
+                        # Rewrite without Fast Downward's "; cost" comment lines
+                        _write_plan(output_file, plan)
                     return True, plan, None
                 else:
-                    return False, None, f"Fast Downward failed: {result.stderr}"
-            except subprocess.TimeoutExpired:
-                return False, None, "Planner timeout (60s)"
+                    return False, None, f"Fast Downward failed: {log_tail}"
             except Exception as e:
                 return False, None, f"Error running Fast Downward: {str(e)}"
     
+    @staticmethod
+    def _run_fast_downward(cmd: List[str], timeout: float = 60):
+        """Run the Fast Downward driver, streaming its log instead of buffering it.
+        
+        Only the last log lines are kept (for error messages). The driver is
+        stopped as soon as it reports the plan cost, which it logs after the
+        plan file has been closed, or once the search gives up.
+        
+        Returns:
+            (finished, returncode, log_tail): finished is True if the plan was
+            reported, False otherwise, and None if the timeout killed the driver
+        """
+        import threading
+        
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1 << 16
+        )
+        timed_out = threading.Event()
+        
+        def on_timeout():
+            timed_out.set()
+            proc.kill()
+        
+        timer = threading.Timer(timeout, on_timeout)
+        timer.start()
+        tail = deque(maxlen=20)
+        finished = False
+        try:
+            for line in proc.stdout:
+                tail.append(line)
+                if "Plan cost:" in line:
+                    finished = True
+                    break
+                if "Search stopped" in line:
+                    break
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.terminate()
+            proc.stdout.close()
+            returncode = proc.wait()
+        if timed_out.is_set() and not finished:
+            return None, returncode, "".join(tail)
+        return finished, returncode, "".join(tail)
+    
     def _solve_unified_planning(
         self,
         domain_file: str,
@@ -269,60 +581,39 @@ class PDDLPlanner:
     ) -> Tuple[bool, Optional[List[str]], Optional[str]]:
         """Solve using Unified Planning library"""
         try:
-            from unified_planning.shortcuts import OneshotPlanner, get_environment
-            from unified_planning.io import PDDLReader
-            from unified_planning.model import Problem
+            import unified_planning
         except ImportError:
             return False, None, "unified-planning library not installed (try: pip install unified-planning)"
         
         try:
-            import tempfile
-            import shutil
-            
-            # Disable credits output
-            get_environment().credits_stream = None
-            
-            # Create temporary files with UTF-8 encoding
-            # This solves Windows encoding issues
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.pddl', delete=False) as temp_domain:
-                with open(domain_file, 'r', encoding='utf-8') as df:
-                    temp_domain.write(df.read())
-                temp_domain_path = temp_domain.name
-            
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.pddl', delete=False) as temp_problem:
-                with open(problem_file, 'r', encoding='utf-8') as pf:
-                    temp_problem.write(pf.read())
-                temp_problem_path = temp_problem.name
-            
-            try:
-                reader = PDDLReader()
-                problem = reader.parse_problem(temp_domain_path, temp_problem_path)
-            
-                # Try with pyperplan engine (native Python)
-                with OneshotPlanner(name='pyperplan') as planner:
-                    result = planner.solve(problem)
-                    
-                    if result.status.name in ['SOLVED_SATISFICING', 'SOLVED_OPTIMALLY']:
-                        plan = self._convert_up_plan_to_pddl(result.plan)
-                        
-                        if output_file:
-                            with open(output_file, 'w') as f:
-                                f.write('\n'.join(plan))
-                        
-                        return True, plan, None
-                    else:
-                        return False, None, f"No solution found: {result.status.name}"
-            finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(temp_domain_path)
-                    os.unlink(temp_problem_path)
-                except:
-                    pass
-        
+            # Try with pyperplan engine (native Python)
+            return self._solve_via_up('pyperplan', domain_file, problem_file, output_file)
+        except FileNotFoundError as e:
+            return False, None, str(e)
         except Exception as e:
-            import traceback
-            return False, None, f"Error with unified-planning: {str(e)}\n{traceback.format_exc()}"
+            return False, None, _error_message(f"Error with unified-planning: {str(e)}")
+    
+    def _solve_via_up(
+        self,
+        engine_name: str,
+        domain_file: str,
+        problem_file: str,
+        output_file: Optional[str]
+    ) -> Tuple[bool, Optional[List[str]], Optional[str]]:
+        """Solve with a (warm) unified-planning engine, shared by both UP backends.
+        
+        Engine and parsing errors are raised: each caller decides whether
+        they are reported or trigger a fallback.
+        """
+        planner = self._warm_planner(engine_name)
+        problem = self._parse_up_problem(domain_file, problem_file)
+        result = planner.solve(problem)
+        if result.status.name in _UP_SOLVED:
+            plan = self._convert_up_plan_to_pddl(result.plan)
+            if output_file:
+                _write_plan(output_file, plan)
+            return True, plan, None
+        return False, None, f"No solution found: {result.status.name}"
     
     def _solve_pyperplan(
         self,
@@ -332,90 +623,269 @@ class PDDLPlanner:
     ) -> Tuple[bool, Optional[List[str]], Optional[str]]:
         """Solve using Pyperplan"""
         try:
-            import pyperplan
+            SEARCHES, HEURISTICS, Parser, grounding = _pyperplan_api()
         except ImportError:
             return False, None, "pyperplan library not installed (try: pip install pyperplan)"
         
         try:
-            from pyperplan.planner import search_plan, SEARCHES, HEURISTICS
-            
             # Get search and heuristic functions
-            search_func = SEARCHES.get('astar')
-            heuristic_class = HEURISTICS.get('hff')
+            search_func = SEARCHES.get(self.search)
+            if search_func is None:
+                return False, None, f"Unknown pyperplan search: {self.search} (available: {', '.join(SEARCHES)})"
+            heuristic_class = None
+            if self.search not in _UNINFORMED_SEARCHES:
+                heuristic_class = HEURISTICS.get(self.heuristic)
+                if heuristic_class is None:
+                    return False, None, f"Unknown pyperplan heuristic: {self.heuristic} (available: {', '.join(HEURISTICS)})"
             
-            # pyperplan.search_plan expects file paths (domain, problem)
-            plan = search_plan(
-                domain_file,
-                problem_file,
-                search_func,
-                heuristic_class
-            )
+            # Same steps as pyperplan.search_plan, but the domain is parsed
+            # once and reused across problems
+            domain = self._get_pyperplan_domain(domain_file)
+            problem = Parser(domain_file, problem_file).parse_problem(domain)
+            task = grounding.ground(problem)
+            heuristic = heuristic_class(task) if heuristic_class else None
+            plan = search_func(task, heuristic) if heuristic else search_func(task)
             
             if plan:
-                # Convert to PDDL-like action strings
-                plan_actions = []
-                for action in plan:
-                    action_str = f"({getattr(action, 'name', 'action')}"
-                    # Try common attribute names for parameters in pyperplan
-                    params = []
-                    if hasattr(action, 'args') and action.args is not None:
-                        params = [str(p) for p in action.args]
-                    elif hasattr(action, 'parameters') and action.parameters is not None:
-                        params = [str(p) for p in action.parameters]
-                    elif hasattr(action, 'signature') and action.signature is not None:
-                        # Fallback: original (older custom structure)
-                        params = [str(sig[0]) for sig in action.signature]
-                    for p in params:
-                        action_str += f" {p}"
-                    action_str += ")"
-                    plan_actions.append(action_str)
+                # Convert to PDDL-like action strings. All actions share one
+                # class, so the parameter attribute is probed on the first only
+                # (pyperplan operators have none: the name is the full action)
+                param_attr = next(
+                    (attr for attr in ('args', 'parameters', 'signature')
+                     if getattr(plan[0], attr, None) is not None),
+                    None
+                )
+                if param_attr is None:
+                    plan_actions = [f"({action.name})" for action in plan]
+                elif param_attr == 'signature':
+                    # Fallback: original (older custom structure)
+                    plan_actions = [
+                        "(" + " ".join([action.name, *(str(sig[0]) for sig in action.signature)]) + ")"
+                        for action in plan
+                    ]
+                else:
+                    get_params = operator.attrgetter(param_attr)
+                    plan_actions = [
+                        "(" + " ".join([action.name, *map(str, get_params(action))]) + ")"
+                        for action in plan
+                    ]
                 
                 if output_file:
-                    with open(output_file, 'w') as f:
-                        f.write('\n'.join(plan_actions))
+                    _write_plan(output_file, plan_actions)
                 
                 return True, plan_actions, None
             else:
                 return False, None, "No solution found"
         
+        except FileNotFoundError as e:
+            return False, None, str(e)
         except Exception as e:
-            import traceback
-            return False, None, f"Error with pyperplan: {str(e)}\n{traceback.format_exc()}"
-    
-    def _parse_fast_downward_plan(self, plan_text: str) -> List[str]:
-        """Parse Fast Downward plan output"""
-        plan = []
-        for line in plan_text.strip().split('\n'):
-            line = line.strip()
-            # Skip comments and empty lines
-            if line and not line.startswith(';'):
-                plan.append(line)
-        return plan
+            return False, None, _error_message(f"Error with pyperplan: {str(e)}")
+    
+    def _get_pyperplan_domain(self, domain_file: str):
+        """Return the pyperplan domain for domain_file, parsing it only once"""
+        Parser = _pyperplan_api()[2]
+        
+        key = ("pyperplan", domain_file, os.stat(domain_file).st_mtime_ns)
+        domain = self._domain_cache.get(key)
+        if domain is None:
+            domain = Parser(domain_file).parse_domain()
+            self._domain_cache[key] = domain
+        return domain
+    
+    def _warm_planner(self, engine_name: str):
+        """Return a OneshotPlanner for engine_name, created once and kept open.
+
+        The engine is reused by every later solve of this instance and
+        closed at interpreter exit.
+        """
+        planner = self._up_planners.get(engine_name)
+        if planner is None:
+            from unified_planning.shortcuts import OneshotPlanner, get_environment
+            # Disable credits output
+            get_environment().credits_stream = None
+            planner = OneshotPlanner(name=engine_name).__enter__()
+            atexit.register(planner.__exit__, None, None, None)
+            self._up_planners[engine_name] = planner
+        return planner
+    
+    def _parse_up_problem(self, domain_file: str, problem_file: str):
+        """Return the unified-planning Problem for a (domain, problem) pair.
+
+        Parsing is cached on the file contents, so a repeated pair (even
+        through another path or planner instance) is not parsed again.
+        """
+        with open(domain_file, 'rb') as f:
+            domain_bytes = f.read()
+        with open(problem_file, 'rb') as f:
+            problem_bytes = f.read()
+        return _parse_up_problem_cached(domain_bytes, problem_bytes)
+    
+    def clear_cache(self) -> None:
+        """Drop this process's parsed domains/problems and memoized plans"""
+        self._domain_cache.clear()
+        self._solve_memo.clear()
+        _parse_up_problem_cached.cache_clear()
+    
+    def _get_sas_dir(self) -> str:
+        """Private directory for translator output, removed by close()
+        (or when the planner is garbage-collected, or at interpreter exit)"""
+        if self._sas_dir is None:
+            import shutil
+            import tempfile
+            self._sas_dir = tempfile.mkdtemp(prefix="pddl_sas_", dir=self._sas_root)
+            self._sas_cleanup = weakref.finalize(self, shutil.rmtree, self._sas_dir, True)
+        return self._sas_dir
+    
+    def close(self):
+        """Remove the translated SAS files of the Fast Downward binary fallback"""
+        if self._sas_cleanup is not None:
+            self._sas_cleanup()
+            self._sas_cleanup = None
+        self._sas_dir = None
+        self._sas_files.clear()
+    
+    def _read_fast_downward_plan(self, plan_file: str) -> List[str]:
+        """Parse a Fast Downward plan file, memory-mapped rather than read into a copy"""
+        with open(plan_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []  # empty files cannot be mapped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as plan_data:
+                return self._parse_fast_downward_plan(plan_data)
+    
+    def _parse_fast_downward_plan(self, plan_data) -> List[str]:
+        """Parse Fast Downward plan output (raw plan-file bytes or a buffer over them)"""
+        # One C-level scan; comment (";") and empty lines never match
+        return [line.decode('utf-8') for line in _PLAN_LINE_RE.findall(plan_data)]
     
     def _convert_up_plan_to_pddl(self, up_plan) -> List[str]:
         """Convert Unified Planning plan to PDDL action strings"""
-        plan = []
-        for action in up_plan.actions:
-            # Convert action to PDDL string format
-            action_str = f"({action.action.name}"
-            for param in action.actual_parameters:
-                action_str += f" {param}"
-            action_str += ")"
-            plan.append(action_str)
-        return plan
+        # One join per action instead of repeated string concatenation
+        return [
+            "(" + " ".join([action.action.name, *map(str, action.actual_parameters)]) + ")"
+            for action in up_plan.actions
+        ]
     
     def _windows_to_wsl_path(self, windows_path: str) -> str:
         """Convert Windows path to WSL path"""
-        path = Path(windows_path).resolve()
-        path_str = str(path)
-        
-        # Convert C:\Users\... to /mnt/c/Users/...
-        if path_str[1] == ':':
-            drive = path_str[0].lower()
-            rest = path_str[2:].replace('\\', '/')
-            return f"/mnt/{drive}{rest}"
-        
-        return path_str.replace('\\', '/')
+        return _windows_to_wsl_path(windows_path)
+
+
+# Planner of the current pool worker, built once by _init_worker
+_worker_planner: Optional[PDDLPlanner] = None
+
+# unified-planning engine each backend solves through (prewarmed per worker)
+_UP_ENGINES = {"fast-downward": "fast-downward", "unified-planning": "pyperplan"}
+
+
+def _init_worker(planner_type: str, use_cache: bool, search: str, heuristic: str, sas_root: str):
+    """Pool initializer: build this worker's planner and warm its UP engine"""
+    global _worker_planner
+    _worker_planner = PDDLPlanner(planner_type, use_cache, search, heuristic)
+    # The pool removes sas_root: workers never run their own cleanup
+    _worker_planner._sas_root = sas_root
+    engine = _UP_ENGINES.get(_worker_planner.planner_type)
+    if engine:
+        try:
+            _worker_planner._warm_planner(engine)
+        except Exception:
+            pass  # solve() reports the error (or falls back) per job
+
+
+def _solve_one(
+    domain_file: str,
+    problem_file: str,
+    output_file: Optional[str] = None
+) -> Tuple[bool, Optional[List[str]], Optional[str]]:
+    """Solve one problem in a worker process (module-level so it can be pickled)"""
+    return _worker_planner.solve(domain_file, problem_file, output_file)
+
+
+# Compact UTF-8 JSON as bytes: orjson when installed, stdlib json otherwise.
+# The stdlib branch uses orjson's separators (",", ":"), so the bytes do not
+# depend on orjson; examples/mock_planner.py does the same, so both planners
+# dispatched by planner.py format their JSON identically
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        import json
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Human-readable labels for the JSON output (fallback: underscores -> spaces)
+_PRETTY_MAP = MappingProxyType(_load_location_labels())
+_pretty_get = _PRETTY_MAP.get
+_UNDERSCORE_TABLE = str.maketrans("_", " ")
+# Fourth token of an action, after any opening parentheses: "((navegar r1 a b))" -> b
+_DEST_RE = re.compile(r'[\s(]*[^\s()]+\s+[^\s()]+\s+[^\s()]+\s+([^\s()]+)')
+
+
+# The hospital domain's only action schema, matched without the regex
+_NAVEGAR_HEAD = "(navegar"
+
+
+def _extract_dest(action_str: str) -> Optional[str]:
+    """Destination of a '(navegar robot from to)' action, tolerating extra parentheses"""
+    # Fast path: exactly "(navegar robot from to)" (Fast Downward, UP), about
+    # 2.5x cheaper than the regex; anything else takes the general parser
+    parts = action_str.split(" ")
+    if len(parts) == 4 and parts[0] == _NAVEGAR_HEAD:
+        return parts[3].rstrip(")") or None
+    m = _DEST_RE.match(action_str)
+    return m.group(1) if m else None
+
+
+def _run_jobs(args, parser) -> int:
+    """Solve every job of a --jobs file in parallel, printing one JSON result per line"""
+    import json
+    
+    jobs = []
+    try:
+        with open(args.jobs, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    parser.error(f"{args.jobs}: each line must be a JSON object, got: {line.strip()}")
+                domain = job.get('domain') or args.domain
+                if not domain or not job.get('problem'):
+                    parser.error(f"{args.jobs}: each job needs a problem (and a domain, "
+                                 f"unless given on the command line)")
+                output = job.get('output')
+                if not all(isinstance(v, str) for v in (domain, job['problem'])) or \
+                        not isinstance(output, (str, type(None))):
+                    parser.error(f"{args.jobs}: domain, problem and output must be strings, "
+                                 f"got: {line.strip()}")
+                jobs.append((domain, job['problem'], output))
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read jobs file {args.jobs}: {e}")
+    
+    planner = PDDLPlanner(
+        args.planner,
+        use_cache=not args.no_cache,
+        search=args.search,
+        heuristic=args.heuristic
+    )
+    
+    lines = []
+    all_ok = True
+    for (domain, problem, _), (success, plan, error) in zip(jobs, planner.solve_jobs(jobs)):
+        result = {"domain": domain, "problem": problem, "success": success}
+        if success:
+            result["plan"] = plan
+        else:
+            result["error"] = error
+            all_ok = False
+        lines.append(_dumps(result))
+    
+    sys.stdout.flush()
+    sys.stdout.buffer.write(b"\n".join(lines) + b"\n" if lines else b"")
+    return 0 if all_ok else 1
 
 
 def main():
@@ -445,9 +915,42 @@ def main():
         action='store_true',
         help='List available planners and exit'
     )
+    parser.add_argument(
+        '--search',
+        default='wastar',
+        help='pyperplan search algorithm (default: wastar; e.g. astar, gbf, bfs)'
+    )
+    parser.add_argument(
+        '--heuristic',
+        default='hff',
+        help='pyperplan heuristic (default: hff; e.g. lmcut, hadd, hmax)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the persistent plan cache'
+    )
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Delete all cached plans (then solve, if domain and problem are given)'
+    )
+    parser.add_argument(
+        '--jobs',
+        metavar='FILE.jsonl',
+        help='Solve in parallel the problems listed in a JSON-lines file, one '
+             '{"problem": ..., "domain": ..., "output": ...} object per line '
+             '(domain defaults to the positional domain, output is optional)'
+    )
     
     args = parser.parse_args()
     
+    if args.clear_cache:
+        removed = plan_cache.clear()
+        print(f"Cleared {removed} cached plan(s)", file=sys.stderr)
+        if not args.domain and not args.problem and not args.list_planners:
+            return 0
+    
     # Handle --list-planners early
     if args.list_planners:
         planner = PDDLPlanner(args.planner)
@@ -455,11 +958,19 @@ def main():
         print(f"Available planners: {', '.join(planner.available_planners)}")
         return 0
     
+    if args.jobs:
+        return _run_jobs(args, parser)
+    
     # Check required arguments
     if not args.domain or not args.problem:
         parser.error("domain and problem are required (unless using --list-planners)")
     
-    planner = PDDLPlanner(args.planner)
+    planner = PDDLPlanner(
+        args.planner,
+        use_cache=not args.no_cache,
+        search=args.search,
+        heuristic=args.heuristic
+    )
     
     success, plan, error = planner.solve(
         args.domain,
@@ -468,56 +979,32 @@ def main():
     )
     
     if success:
-        # Optionally: write full plan to file if requested
-        if args.output and plan:
-            with open(args.output, 'w') as f:
-                f.write('\n'.join(plan))
-
+        # The full plan was already written to args.output by solve()
         if args.raw:
-            # Raw PDDL plan output
+            # Raw PDDL plan output, written in one call
             if plan:
-                for action in plan:
-                    print(action)
+                sys.stdout.write("".join([f"{action}\n" for action in plan]))
         else:
             # Default: emit SIMPLE per-step JSON to stdout
-            pretty_map = {
-                "farmacia": "farmácia",
-                "recepcao": "recepção",
-                "corredor_central": "corredor central",
-                "corredor_ala_1": "corredor ala 1",
-                "corredor_ala_2": "corredor ala 2",
-                "corredor_ala_3": "corredor ala 3",
-                "sala_cirurgia": "sala de cirurgia",
-                "quarto_101": "quarto 101",
-                "quarto_102": "quarto 102",
-            }
-
-            def _extract_dest(action_str: str) -> Optional[str]:
-                s = action_str.strip()
-                while s.startswith('(') and s.endswith(')'):
-                    inner = s[1:-1].strip()
-                    if not inner or inner.startswith('(') and inner.endswith(')'):
-                        s = inner
-                    else:
-                        s = '(' + inner + ')'
-                        break
-                parts = s.strip('()').split()
-                if len(parts) >= 4:
-                    return parts[3]
-                return None
-
             if plan:
+                lines = []
                 for act in plan:
                     dest = _extract_dest(act)
                     if not dest:
                         continue
-                    destination_label = pretty_map.get(dest, dest.replace('_', ' '))
+                    destination_label = _pretty_get(dest) or dest.translate(_UNDERSCORE_TABLE)
                     result = {
                         "task": "navigate",
                         "destination": dest,
                         "destination_label": destination_label,
                     }
-                    print(json.dumps(result, ensure_ascii=False))
+                    lines.append(_dumps(result))
+                if lines:
+                    # Encoded once and written as bytes, after anything already
+                    # buffered in the text layer
+                    sys.stdout.flush()
+                    sys.stdout.buffer.write(b"\n".join(lines) + b"\n")
+                    sys.stdout.buffer.flush()
         return 0
     else:
         print(f"Error: {error}", file=sys.stderr)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Persistent plan cache for the PDDL planner wrapper
+
+Plans are stored one JSON file per key under ~/.cache/pddl_planner, where
+the key combines the planner name with the SHA1 of the domain and problem
+file contents. Solving the same (domain, problem) pair again returns the
+stored plan without spawning or running any planner.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Optional
+
+CACHE_DIR = Path("~/.cache/pddl_planner").expanduser()
+
+
+def _file_digest(path: str) -> str:
+    """SHA1 hex digest of a file's bytes"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def make_key(planner_type: str, domain_file: str, problem_file: str) -> str:
+    """Cache key for a (domain, problem) pair, based on file contents
+
+    The planner name is part of the key because backends may return
+    different (equally valid) plans and action spellings.
+    """
+    return f"{planner_type}-{_file_digest(domain_file)}{_file_digest(problem_file)}"
+
+
+def get(key: str) -> Optional[List[str]]:
+    """Return the cached plan for key, or None on a miss"""
+    try:
+        with open(CACHE_DIR / f"{key}.json", 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return plan if isinstance(plan, list) else None
+
+
+def put(key: str, plan: List[str]) -> None:
+    """Store plan under key (written atomically; failures are ignored)"""
+    import tempfile
+    tmp_path = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(plan, f)
+        os.replace(tmp_path, CACHE_DIR / f"{key}.json")
+    except (OSError, TypeError, ValueError):
+        # Do not leave a partial temp file behind (clear() only removes *.json)
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def clear() -> int:
+    """Remove every cached plan, returning how many were deleted"""
+    removed = 0
+    if CACHE_DIR.is_dir():
+        for entry in CACHE_DIR.glob('*.json'):
+            try:
+                entry.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
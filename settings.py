@@ -113,9 +113,17 @@ VENV_PATH = ".venv/bin/activate"
 # Timeout para execução (segundos)
 EXECUTION_TIMEOUT = 60
 
+# Na CLI, substituir o processo pelo planner (os.execvpe) em vez de esperá-lo.
+# Economiza um processo residente, mas desativa o timeout e a mensagem final
+# (só em POSIX; desativado por padrão para manter o EXECUTION_TIMEOUT)
+EXEC_PLANNER = False
+
 # Mostrar informações de debug
 DEBUG_MODE = False
 
+# Reutilizar planos do cache persistente (~/.cache/pddl_planner)
+USE_PLAN_CACHE = True
+
 # ============================================================================
 # CONFIGURAÇÕES DE INTERFACE
 # ============================================================================